@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import argparse
 import os
+import pickle
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any, NamedTuple
 
 from common import (
     GREEN,
@@ -11,23 +13,34 @@ from common import (
     RED,
     available_top_level_c_files,
     banner,
+    build_floor_for_dir,
     colour,
     compile_source,
     expand_sections,
     headers_for_source,
     link_executable,
+    load_parse_cache,
+    make_obj_dirs,
+    max_header_mtime,
+    obj_path,
     parse_sections_and_defines,
     prefix,
+    prioritized_sections,
+    run_command,
+    save_parse_cache,
     section_sources,
     select_cflags,
     source_defines_for_dir,
+    tree_signature,
     unique,
+    write_if_changed,
 )
 
 ROOT = Path(__file__).resolve().parent.parent
 SRC_DIR = ROOT / "src"
 BIN_DIR = ROOT / "_bin"
 OBJ_BASE = ROOT / "_obj"
+CACHE_DIR = Path(os.environ.get("NERD_CACHE_DIR", ROOT / "_cache"))
 SCRIPT_PATH = Path(__file__).resolve()
 COMMON_PATH = SCRIPT_PATH.parent / "common.py"
 
@@ -36,13 +49,51 @@ INCLUDE_FLAGS = ["-Isrc"]
 LDFLAGS: list[str] = []
 
 
-def parse_args(argv: list[str]) -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Build nerd projects.")
-    parser.add_argument("projects", nargs="*", help="Project names (omit to build all)")
-    parser.add_argument(
-        "-r", "--release", action="store_true", help="Build release profile"
-    )
-    return parser.parse_args(argv[1:])
+USAGE = """\
+usage: build.py [-r] [--cache] [--ninja] [projects ...]
+
+Build nerd projects.
+
+  projects       Project names (omit to build all)
+  -r, --release  Build release profile
+  --cache        Reuse objects from the content-addressed cache in _cache/
+  --ninja        Generate build.ninja and delegate compilation to ninja
+"""
+
+
+class Args(NamedTuple):
+    projects: list[str]
+    release: bool
+    cache: bool
+    ninja: bool
+
+
+def parse_args(argv: list[str]) -> Args:
+    # Hand-rolled instead of argparse: this script runs on every
+    # edit-compile cycle and argparse costs several ms of import and
+    # parser construction before any work starts.
+    projects: list[str] = []
+    release = cache = ninja = False
+    for arg in argv[1:]:
+        if arg in ("-h", "--help"):
+            print(USAGE, end="")
+            raise SystemExit(0)
+        elif arg in ("-r", "--release"):
+            release = True
+        elif arg == "--cache":
+            cache = True
+        elif arg == "--ninja":
+            ninja = True
+        elif arg.startswith("-"):
+            raise SystemExit(colour(f"Unknown option '{arg}'", RED) + "\n" + USAGE)
+        else:
+            projects.append(arg)
+    if ninja and cache:
+        raise SystemExit(
+            colour("--ninja does not support --cache: ninja invokes the compiler "
+                   "directly, bypassing the object cache", RED)
+        )
+    return Args(projects, release, cache, ninja)
 
 
 def available_projects() -> list[str]:
@@ -57,10 +108,11 @@ def sources_for_project(project: str) -> tuple[list[Path], list[str]]:
         )
 
     sections, defines = parse_sections_and_defines(root_src, SRC_DIR)
-    sections = expand_sections(sections, SRC_DIR)
-    sources: list[Path] = [root_src]
+    sections = prioritized_sections(expand_sections(sections, SRC_DIR), SRC_DIR)
+    sources: list[Path] = []
     for section in sections:
         sources.extend(section_sources(section, SRC_DIR))
+    sources.append(root_src)
     return unique(sources), defines
 
 
@@ -70,36 +122,29 @@ def executable_path(project: str, profile: str) -> Path:
     return BIN_DIR / f"{project}{suffix}{extension}"
 
 
-def main(argv: list[str] | None = None) -> None:
-    argv = argv or sys.argv
-    args = parse_args(argv)
-
-    profile = "release" if args.release else "debug"
-    cflags = select_cflags(profile)
-    obj_dir = OBJ_BASE / profile
-
-    projects = args.projects or available_projects()
-    if not projects:
-        raise SystemExit(colour("No projects found in src/", RED))
-
+def plan_projects(projects: list[str]) -> dict[str, Any]:
+    """Resolve sources, flags and rebuild floors for every project."""
     project_sources: dict[str, list[Path]] = {}
     project_defines: dict[str, list[str]] = {}
-    for name in projects:
-        sources, defines = sources_for_project(name)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        planned = list(executor.map(sources_for_project, projects))
+    for name, (sources, defines) in zip(projects, planned):
         project_sources[name] = sources
         project_defines[name] = defines
 
     all_sources = unique(src for sources in project_sources.values() for src in sources)
-    banner(profile, projects, "projects", CC)
-    if not all_sources:
-        raise SystemExit(colour("No C sources found in src/", RED))
 
+    tool_mtime = max(SCRIPT_PATH.stat().st_mtime, COMMON_PATH.stat().st_mtime)
     extra_flags_by_source: dict[Path, list[str]] = {}
     header_deps_by_source: dict[Path, list[Path]] = {}
+    header_ceiling_by_source: dict[Path, float] = {}
+    floor_by_source: dict[Path, float] = {}
     for src in all_sources:
         defines = source_defines_for_dir(src.parent, SRC_DIR)
-        extra_flags_by_source[src] = [f"-D{define}" for define in defines]
+        extra_flags_by_source[src] = [f"-D{define}" for define in sorted(defines)]
         header_deps_by_source[src] = headers_for_source(src, SRC_DIR, SRC_DIR)
+        header_ceiling_by_source[src] = max_header_mtime(header_deps_by_source[src])
+        floor_by_source[src] = max(tool_mtime, build_floor_for_dir(src.parent, SRC_DIR))
 
     for project in projects:
         root_src = SRC_DIR / f"{project}.c"
@@ -107,31 +152,177 @@ def main(argv: list[str] | None = None) -> None:
         if defines:
             extra_flags_by_source[root_src] = [
                 *extra_flags_by_source.get(root_src, []),
-                *[f"-D{define}" for define in defines],
+                *[f"-D{define}" for define in sorted(defines)],
             ]
 
-    compiled: dict[Path, Path] = {}
-    skipped_sources = 0
+    return {
+        "project_sources": project_sources,
+        "all_sources": all_sources,
+        "extra_flags_by_source": extra_flags_by_source,
+        "header_deps_by_source": header_deps_by_source,
+        "header_ceiling_by_source": header_ceiling_by_source,
+        "floor_by_source": floor_by_source,
+    }
+
+
+def load_plan(path: Path, signature: str, projects: list[str]) -> dict[str, Any] | None:
+    try:
+        with open(path, "rb") as handle:
+            saved = pickle.load(handle)
+    except (OSError, pickle.PickleError, EOFError):
+        return None
+    if saved.get("signature") != signature or saved.get("projects") != projects:
+        return None
+    return saved["plan"]
+
+
+def save_plan(
+    path: Path, signature: str, projects: list[str], plan: dict[str, Any]
+) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as handle:
+        pickle.dump({"signature": signature, "projects": projects, "plan": plan}, handle)
+
+
+def print_build_complete() -> None:
+    finish_bar = colour("=" * 48, GREEN)
+    print(finish_bar)
+    print(colour(">> Build complete. Go be nerdy! \\o/ <<", GREEN))
+    print(finish_bar)
+
+
+def build_with_ninja(
+    *,
+    profile: str,
+    cflags: list[str],
+    obj_dir: Path,
+    projects: list[str],
+    all_sources: list[Path],
+    project_sources: dict[str, list[Path]],
+    extra_flags_by_source: dict[Path, list[str]],
+) -> None:
+    """Emit a build.ninja covering every TU and executable, then run ninja.
+
+    Ninja's depfile machinery (-MMD + deps = gcc) replaces the Python
+    mtime walk, so header tracking is exact and no-op builds are
+    sub-second even on large trees.
+    """
+    lines = [
+        f"cc = {CC}",
+        # Keep .ninja_log/.ninja_deps under _obj/<profile>/ instead of
+        # littering the repo root (we invoke ninja from ROOT with -f).
+        f"builddir = {obj_dir}",
+        "",
+        "rule cc",
+        "  command = $cc $flags -MMD -MF $out.d -c $in -o $out",
+        "  depfile = $out.d",
+        "  deps = gcc",
+        "  description = [ cc ] $in",
+        "",
+        "rule link",
+        f"  command = $cc -o $out $in {' '.join(LDFLAGS)}".rstrip(),
+        "  description = [link] $out",
+        "",
+    ]
     for src in all_sources:
-        obj, skipped = compile_source(
-            cc=CC,
+        obj = obj_path(src, obj_dir, SRC_DIR)
+        flags = " ".join([*cflags, *extra_flags_by_source.get(src, []), *INCLUDE_FLAGS])
+        lines.append(f"build {obj}: cc {src}")
+        lines.append(f"  flags = {flags}")
+    for project in projects:
+        executable = executable_path(project, profile)
+        objects = " ".join(
+            str(obj_path(src, obj_dir, SRC_DIR)) for src in project_sources[project]
+        )
+        lines.append(f"build {executable}: link {objects}")
+    lines.append(
+        "default "
+        + " ".join(str(executable_path(project, profile)) for project in projects)
+    )
+
+    ninja_file = obj_dir / "build.ninja"
+    obj_dir.mkdir(parents=True, exist_ok=True)
+    write_if_changed(ninja_file, "\n".join(lines) + "\n")
+    run_command(["ninja", "-f", str(ninja_file)], capture=False)
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = argv or sys.argv
+    args = parse_args(argv)
+
+    profile = "release" if args.release else "debug"
+    cflags = select_cflags(profile, ROOT)
+    obj_dir = OBJ_BASE / profile
+    parse_cache_path = obj_dir / ".parse_cache.pkl"
+    load_parse_cache(parse_cache_path)
+
+    projects = args.projects or available_projects()
+    if not projects:
+        raise SystemExit(colour("No projects found in src/", RED))
+
+    signature = tree_signature([SRC_DIR], [SCRIPT_PATH, COMMON_PATH])
+    plan_path = obj_dir / ".plan.pkl"
+    plan = load_plan(plan_path, signature, projects)
+    if plan is None:
+        plan = plan_projects(projects)
+        save_parse_cache(parse_cache_path)
+        save_plan(plan_path, signature, projects, plan)
+
+    project_sources: dict[str, list[Path]] = plan["project_sources"]
+    all_sources: list[Path] = plan["all_sources"]
+    extra_flags_by_source: dict[Path, list[str]] = plan["extra_flags_by_source"]
+    header_deps_by_source: dict[Path, list[Path]] = plan["header_deps_by_source"]
+    header_ceiling_by_source: dict[Path, float] = plan["header_ceiling_by_source"]
+    floor_by_source: dict[Path, float] = plan["floor_by_source"]
+
+    banner(profile, projects, "projects", CC)
+    if not all_sources:
+        raise SystemExit(colour("No C sources found in src/", RED))
+
+    if args.ninja:
+        build_with_ninja(
+            profile=profile,
             cflags=cflags,
-            include_flags=INCLUDE_FLAGS,
             obj_dir=obj_dir,
-            src=src,
-            relative_to=SRC_DIR,
-            display_root=SRC_DIR,
-            extra_flags=extra_flags_by_source.get(src, []),
-            header_deps=header_deps_by_source.get(src, []),
-            extra_deps=[SCRIPT_PATH, COMMON_PATH],
-            local_build_root=SRC_DIR,
+            projects=projects,
+            all_sources=all_sources,
+            project_sources=project_sources,
+            extra_flags_by_source=extra_flags_by_source,
         )
-        compiled[src] = obj
-        if skipped:
-            skipped_sources += 1
+        print_build_complete()
+        return
+
+    make_obj_dirs(obj_path(src, obj_dir, SRC_DIR) for src in all_sources)
 
-    for project, sources in project_sources.items():
-        objects = [compiled[src] for src in sources]
+    compiled: dict[Path, Path] = {}
+    skipped_sources = 0
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            executor.submit(
+                compile_source,
+                cc=CC,
+                cflags=cflags,
+                include_flags=INCLUDE_FLAGS,
+                obj_dir=obj_dir,
+                src=src,
+                relative_to=SRC_DIR,
+                display_root=SRC_DIR,
+                extra_flags=extra_flags_by_source.get(src, []),
+                header_deps=header_deps_by_source.get(src, []),
+                header_mtime_max=header_ceiling_by_source.get(src, 0.0),
+                floor_mtime=floor_by_source[src],
+                cache_root=CACHE_DIR if args.cache else None,
+            ): src
+            for src in all_sources
+        }
+        for future in as_completed(futures):
+            obj, skipped = future.result()
+            compiled[futures[future]] = obj
+            if skipped:
+                skipped_sources += 1
+
+    def link_project(project: str) -> None:
+        objects = [compiled[src] for src in project_sources[project]]
         link_executable(
             cc=CC,
             ldflags=LDFLAGS,
@@ -141,11 +332,11 @@ def main(argv: list[str] | None = None) -> None:
             executable=executable_path(project, profile),
         )
 
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(link_project, projects))
+
     print(f"{prefix('skip', GREY)} {skipped_sources} source file(s) up to date")
-    finish_bar = colour("=" * 48, GREEN)
-    print(finish_bar)
-    print(colour(">> Build complete. Go be nerdy! \\o/ <<", GREEN))
-    print(finish_bar)
+    print_build_complete()
 
 
 if __name__ == "__main__":
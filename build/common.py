@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import pickle
 import re
+import shutil
 import subprocess
 import sys
+import threading
+from collections import deque
 from pathlib import Path
-from textwrap import wrap
 from typing import Iterable
 
 RED = "\033[31m"
@@ -17,6 +21,12 @@ BOLD = "\033[1m"
 RESET = "\033[0m"
 
 
+PRINT_LOCK = threading.Lock()
+
+_DIRECTIVE_RE = re.compile(r"\s*//>\s*(\w+)\s*:\s*(.*)$")
+_BARE_DIRECTIVE_RE = re.compile(r"(\w+)\s*:\s*(.*)$")
+
+
 def colour(text: str, prefix: str) -> str:
     return f"{prefix}{text}{RESET}"
 
@@ -25,32 +35,57 @@ def prefix(label: str, color: str) -> str:
     return colour(f"[{label:^4}]", color + (BOLD if color != GREY else ""))
 
 
-def run_command(cmd: list[str]) -> None:
-    sys.stdout.flush()
-    sys.stderr.flush()
-    result = subprocess.run(cmd)
+def run_command(cmd: list[str], *, capture: bool = True) -> None:
+    if capture:
+        # Buffer the command's output and emit it as one block under the
+        # print lock, so concurrent compiles never interleave diagnostics.
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.stdout or result.stderr:
+            with PRINT_LOCK:
+                sys.stdout.write(result.stdout)
+                sys.stdout.flush()
+                sys.stderr.write(result.stderr)
+                sys.stderr.flush()
+    else:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        result = subprocess.run(cmd)
     if result.returncode != 0:
         joined = " ".join(map(str, cmd))
         bar = colour("=" * 48, RED)
-        print(bar, file=sys.stderr)
-        print(f"{prefix('fail', RED)} exit {result.returncode}", file=sys.stderr)
-        print(colour(joined, GREY), file=sys.stderr)
-        print(bar, file=sys.stderr)
+        with PRINT_LOCK:
+            print(bar, file=sys.stderr)
+            print(f"{prefix('fail', RED)} exit {result.returncode}", file=sys.stderr)
+            print(colour(joined, GREY), file=sys.stderr)
+            print(bar, file=sys.stderr)
         raise SystemExit(result.returncode)
 
 
-def select_cflags(profile: str) -> list[str]:
-    base = ["-std=c23", "-Wall", "-Wextra", "-pipe"]
+def select_cflags(profile: str, root: Path | None = None) -> list[str]:
+    # Colors are forced so diagnostics survive the capture-then-print
+    # pipeline used by the parallel compile driver.
+    base = ["-std=c23", "-Wall", "-Wextra", "-pipe", "-fdiagnostics-color=always"]
+    # Reproducible objects: reject __DATE__/__TIME__ and strip the
+    # checkout path so cache keys match across workspaces and CI.
+    base.append("-Werror=date-time")
+    if root is not None:
+        base.append(f"-ffile-prefix-map={root}=.")
     if profile == "debug":
         return [*base, "-g", "-O0", "-DDEBUG"]
     return [*base, "-O2", "-DNDEBUG"]
 
 
 def available_top_level_c_files(source_dir: Path) -> list[str]:
-    return sorted(path.stem for path in source_dir.glob("*.c"))
+    return sorted(
+        entry.name[:-2]
+        for entry in os.scandir(source_dir)
+        if entry.is_file() and entry.name.endswith(".c")
+    )
 
 
 def banner(profile: str, items: list[str], noun: str, cc: str) -> None:
+    from textwrap import wrap
+
     bar = "=" * 48
     print(colour(bar, CYAN))
     print(colour(f" build :: {cc} :: {profile} ", BOLD + CYAN))
@@ -82,16 +117,105 @@ def module_root_for_path(path: Path, source_root: Path) -> Path | None:
     return candidate if candidate.is_dir() else None
 
 
+_HeaderMap = dict[Path, list[tuple[Path, float]]]
+_SourceMap = dict[Path, list[Path]]
+
+_tree_scan_cache: dict[str, tuple[_HeaderMap, _SourceMap]] = {}
+_header_mtimes: dict[Path, float] = {}
+
+
+def _scan_tree(root: Path) -> tuple[_HeaderMap, _SourceMap]:
+    """Walk root once, mapping each directory to the headers and sources
+    in its subtree.
+
+    Uses os.scandir so header mtimes come from the cached DirEntry stat
+    (one syscall per entry); every subsequent subtree query is a dict
+    lookup instead of an rglob.
+    """
+    key = str(root)
+    cached = _tree_scan_cache.get(key)
+    if cached is not None:
+        return cached
+
+    headers: _HeaderMap = {}
+    sources: _SourceMap = {}
+
+    def scan(directory: Path) -> tuple[list[tuple[Path, float]], list[Path]]:
+        dir_headers: list[tuple[Path, float]] = []
+        dir_sources: list[Path] = []
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                child_headers, child_sources = scan(directory / entry.name)
+                dir_headers.extend(child_headers)
+                dir_sources.extend(child_sources)
+            elif entry.name.endswith(".h"):
+                path = directory / entry.name
+                mtime = entry.stat().st_mtime
+                dir_headers.append((path, mtime))
+                _header_mtimes[path] = mtime
+            elif entry.name.endswith(".c"):
+                dir_sources.append(directory / entry.name)
+        dir_headers.sort()
+        dir_sources.sort()
+        headers[directory] = dir_headers
+        sources[directory] = dir_sources
+        return dir_headers, dir_sources
+
+    scan(root)
+    _tree_scan_cache[key] = (headers, sources)
+    return headers, sources
+
+
+def header_map(root: Path) -> _HeaderMap:
+    return _scan_tree(root)[0]
+
+
+def source_map(root: Path) -> _SourceMap:
+    return _scan_tree(root)[1]
+
+
+def max_header_mtime(headers: Iterable[Path]) -> float:
+    result = 0.0
+    for header in headers:
+        mtime = _header_mtimes.get(header)
+        if mtime is None:
+            mtime = header.stat().st_mtime if header.exists() else 0.0
+            _header_mtimes[header] = mtime
+        if mtime > result:
+            result = mtime
+    return result
+
+
 def section_headers(section: str, section_root: Path) -> list[Path]:
-    directory = section_root / section
-    if not directory.is_dir():
-        return []
-    return sorted(directory.rglob("*.h"))
+    entries = header_map(section_root).get(section_root / section, [])
+    return [header for header, _ in entries]
+
+
+class OrderedUniqueList:
+    """Insertion-ordered string collection with O(1) membership checks."""
+
+    __slots__ = ("_items", "_seen")
+
+    def __init__(self, items: Iterable[str] = ()) -> None:
+        self._items: list[str] = []
+        self._seen: set[str] = set()
+        self.extend(items)
 
+    def add(self, item: str) -> None:
+        if item not in self._seen:
+            self._seen.add(item)
+            self._items.append(item)
 
-def _add_unique(items: list[str], value: str) -> None:
-    if value not in items:
-        items.append(value)
+    def extend(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def as_list(self) -> list[str]:
+        return self._items
 
 
 def _normalize_section(path: Path) -> str:
@@ -110,27 +234,57 @@ def _resolve_use_token(token: str, source: Path, section_root: Path) -> str:
     return token
 
 
+def _resolve_sections(
+    tokens: Iterable[str], source: Path, section_root: Path
+) -> list[str]:
+    """Resolve raw use: tokens against the current directory layout.
+
+    Resolution depends on which directories exist, so it runs per use
+    rather than being baked into the persisted parse cache.
+    """
+    resolved = OrderedUniqueList()
+    for token in tokens:
+        resolved.add(_resolve_use_token(token, source, section_root))
+    return resolved.as_list()
+
+
 def _parse_command_lines(
     lines: Iterable[str],
     source: Path,
     *,
     require_prefix: bool,
-    section_root: Path,
 ) -> tuple[list[str], list[str]]:
-    sections: list[str] = []
-    defines: list[str] = []
+    sections = OrderedUniqueList()
+    defines = OrderedUniqueList()
+    in_block_comment = False
     for line_no, line in enumerate(lines, start=1):
         if require_prefix:
-            match = re.match(r"\s*//>\s*(\w+)\s*:\s*(.*)$", line)
+            match = _DIRECTIVE_RE.match(line)
             if not match:
-                continue
+                stripped = line.strip()
+                if in_block_comment:
+                    if "*/" not in stripped:
+                        continue
+                    stripped = stripped.split("*/", 1)[1].lstrip()
+                    in_block_comment = False
+                while stripped.startswith("/*"):
+                    if "*/" not in stripped:
+                        in_block_comment = True
+                        stripped = ""
+                        break
+                    stripped = stripped.split("*/", 1)[1].lstrip()
+                if not stripped or stripped.startswith(("//", "#")):
+                    continue
+                # Directives live in the leading comment block; stop
+                # scanning at the first line of real code.
+                break
         else:
             stripped = line.strip()
             if not stripped or stripped.startswith("#"):
                 continue
             if stripped.startswith("//>"):
                 stripped = stripped[3:].lstrip()
-            match = re.match(r"(\w+)\s*:\s*(.*)$", stripped)
+            match = _BARE_DIRECTIVE_RE.match(stripped)
             if not match:
                 raise SystemExit(
                     colour(
@@ -152,8 +306,7 @@ def _parse_command_lines(
                             RED,
                         )
                     )
-                resolved = _resolve_use_token(token, source, section_root)
-                _add_unique(sections, resolved)
+                sections.add(token)
         elif command == "def":
             for token in tokens:
                 if token == "=" or token.startswith("=") or token.endswith("="):
@@ -163,7 +316,7 @@ def _parse_command_lines(
                             RED,
                         )
                     )
-                _add_unique(defines, token)
+                defines.add(token)
         else:
             border_top = colour("┌──────┬───────────────────────┐", CYAN)
             border_mid = colour("├──────┼───────────────────────┤", CYAN)
@@ -203,22 +356,77 @@ def _parse_command_lines(
                 + "\n"
                 + "\n".join(table_lines)
             )
-    return sections, defines
+    return sections.as_list(), defines.as_list()
+
+
+_FileParseCache = dict[
+    tuple[str, str], tuple[tuple[int, int], tuple[list[str], list[str]]]
+]
+
+_file_parse_cache: _FileParseCache = {}
+_module_header_cache: dict[tuple[str, str], Path | None] = {}
+_module_config_cache: dict[tuple[str, str], tuple[list[str], list[str]]] = {}
+_headers_cache: dict[tuple[str, str, str], list[Path]] = {}
+
+
+def _file_signature(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_parse_cache(path: Path) -> None:
+    global _file_parse_cache
+    try:
+        with open(path, "rb") as handle:
+            _file_parse_cache = pickle.load(handle)
+    except (OSError, pickle.PickleError, EOFError):
+        _file_parse_cache = {}
+
+
+def save_parse_cache(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as handle:
+        pickle.dump(_file_parse_cache, handle)
 
 
 def parse_sections_and_defines(
     src: Path, section_root: Path
 ) -> tuple[list[str], list[str]]:
-    text = src.read_text(encoding="utf-8", errors="ignore")
-    return _parse_command_lines(
-        text.splitlines(),
-        src,
-        require_prefix=True,
-        section_root=section_root,
-    )
+    key = (str(src), str(section_root))
+    signature = _file_signature(src)
+    cached = _file_parse_cache.get(key)
+    if cached is None or cached[0] != signature:
+        # Directives sit at the top of the file, so reading a bounded prefix
+        # avoids pulling large files through the kernel just to scan comments.
+        with open(src, "rb") as handle:
+            head = handle.read(8192)
+        lines = head.decode("utf-8", "ignore").splitlines()
+        if len(head) == 8192 and not head.endswith(b"\n") and lines:
+            # The read may have stopped mid-line; a truncated directive
+            # would parse as a bogus token, so drop the partial line.
+            lines.pop()
+        cached = (signature, _parse_command_lines(lines, src, require_prefix=True))
+        _file_parse_cache[key] = cached
+
+    # The cache holds raw tokens: resolution depends on which module
+    # directories exist, which can change without touching the file.
+    tokens, defines = cached[1]
+    return _resolve_sections(tokens, src, section_root), defines
 
 
 def module_header_for_dir(directory: Path, section_root: Path) -> Path | None:
+    key = (str(directory), str(section_root))
+    if key in _module_header_cache:
+        return _module_header_cache[key]
+
+    header = _module_header_for_dir_uncached(directory, section_root)
+    _module_header_cache[key] = header
+    return header
+
+
+def _module_header_for_dir_uncached(
+    directory: Path, section_root: Path
+) -> Path | None:
     if directory == section_root:
         return None
 
@@ -245,20 +453,39 @@ def module_header_for_dir(directory: Path, section_root: Path) -> Path | None:
 
 
 def parse_build_file(build_file: Path, section_root: Path) -> tuple[list[str], list[str]]:
-    text = build_file.read_text(encoding="utf-8", errors="ignore")
-    return _parse_command_lines(
-        text.splitlines(),
-        build_file,
-        require_prefix=False,
-        section_root=section_root,
-    )
+    key = (str(build_file), str(section_root))
+    signature = _file_signature(build_file)
+    cached = _file_parse_cache.get(key)
+    if cached is None or cached[0] != signature:
+        text = build_file.read_text(encoding="utf-8", errors="ignore")
+        cached = (
+            signature,
+            _parse_command_lines(text.splitlines(), build_file, require_prefix=False),
+        )
+        _file_parse_cache[key] = cached
+
+    tokens, defines = cached[1]
+    return _resolve_sections(tokens, build_file, section_root), defines
 
 
 def module_config_for_dir(
     directory: Path, section_root: Path
 ) -> tuple[list[str], list[str]]:
-    sections: list[str] = []
-    defines: list[str] = []
+    key = (str(directory), str(section_root))
+    cached = _module_config_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = _module_config_for_dir_uncached(directory, section_root)
+    _module_config_cache[key] = result
+    return result
+
+
+def _module_config_for_dir_uncached(
+    directory: Path, section_root: Path
+) -> tuple[list[str], list[str]]:
+    sections = OrderedUniqueList()
+    defines = OrderedUniqueList()
     header = module_header_for_dir(directory, section_root)
     if header:
         h_sections, h_defines = parse_sections_and_defines(header, section_root)
@@ -267,19 +494,17 @@ def module_config_for_dir(
     build_file = directory / ".build"
     if build_file.exists():
         b_sections, b_defines = parse_build_file(build_file, section_root)
-        for section in b_sections:
-            _add_unique(sections, section)
-        for define in b_defines:
-            _add_unique(defines, define)
-    return sections, defines
+        sections.extend(b_sections)
+        defines.extend(b_defines)
+    return sections.as_list(), defines.as_list()
 
 
 def expand_sections(sections: list[str], section_root: Path) -> list[str]:
     ordered = list(sections)
     seen = set(sections)
-    pending = list(sections)
+    pending = deque(sections)
     while pending:
-        section = pending.pop(0)
+        section = pending.popleft()
         deps, _ = module_config_for_dir(section_root / section, section_root)
         for dep in deps:
             if dep not in seen:
@@ -289,11 +514,91 @@ def expand_sections(sections: list[str], section_root: Path) -> list[str]:
     return ordered
 
 
+def tree_signature(roots: Iterable[Path], extra_files: Iterable[Path] = ()) -> str:
+    """Hash the (path, mtime) of every planning input under roots.
+
+    Covers *.c, *.h and .build files plus any extra files given; if the
+    signature matches a previous run's, the saved plan is still valid.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    entries: list[str] = []
+
+    def scan(directory: Path) -> None:
+        try:
+            dir_entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        for entry in dir_entries:
+            if entry.is_dir(follow_symlinks=False):
+                scan(Path(entry.path))
+            elif entry.name.endswith((".c", ".h")) or entry.name == ".build":
+                entries.append(f"{entry.path}:{entry.stat().st_mtime_ns}")
+
+    for root in roots:
+        scan(root)
+    for path in extra_files:
+        if path.exists():
+            entries.append(f"{path}:{path.stat().st_mtime_ns}")
+
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def prioritized_sections(sections: list[str], section_root: Path) -> list[str]:
+    """Order sections so the deepest dependency chains are scheduled first.
+
+    Runs Kahn's algorithm over the module graph, computing for each
+    section the length of the longest chain of dependents above it and
+    its transitive dependent count. Feeding sources to the compile pool
+    in this order keeps critical-path modules from being starved by
+    short chains. Sections on a cycle keep whatever depth was reached
+    when the sort stalled.
+    """
+    known = set(sections)
+    deps: dict[str, list[str]] = {}
+    for section in sections:
+        section_deps, _ = module_config_for_dir(section_root / section, section_root)
+        deps[section] = [dep for dep in section_deps if dep in known]
+
+    pending_dependents: dict[str, int] = {section: 0 for section in deps}
+    for section_deps in deps.values():
+        for dep in section_deps:
+            pending_dependents[dep] += 1
+
+    chain_depth = {section: 1 for section in deps}
+    transitive_dependents: dict[str, set[str]] = {section: set() for section in deps}
+    ready = deque(
+        section for section in sections if pending_dependents[section] == 0
+    )
+    while ready:
+        section = ready.popleft()
+        for dep in deps[section]:
+            chain_depth[dep] = max(chain_depth[dep], chain_depth[section] + 1)
+            transitive_dependents[dep].update(
+                {section}, transitive_dependents[section]
+            )
+            pending_dependents[dep] -= 1
+            if pending_dependents[dep] == 0:
+                ready.append(dep)
+
+    order = {section: index for index, section in enumerate(sections)}
+    return sorted(
+        sections,
+        key=lambda section: (
+            -chain_depth[section],
+            -len(transitive_dependents[section]),
+            order[section],
+        ),
+    )
+
+
 def section_sources(section: str, section_root: Path) -> list[Path]:
     directory = section_root / section
     if not directory.is_dir():
         raise SystemExit(colour(f"Missing section directory: {directory}", RED))
-    return sorted(directory.rglob("*.c"))
+    return source_map(section_root).get(directory, [])
 
 
 def dependency_sections_for_source(
@@ -301,11 +606,10 @@ def dependency_sections_for_source(
     source_root: Path,
     section_root: Path,
 ) -> list[str]:
-    sections: list[str] = []
+    sections = OrderedUniqueList()
     if src.suffix == ".c" and src.exists():
         source_sections, _ = parse_sections_and_defines(src, section_root)
-        for section in source_sections:
-            _add_unique(sections, section)
+        sections.extend(source_sections)
 
     module_dir = src.parent
     if (
@@ -314,19 +618,33 @@ def dependency_sections_for_source(
         and module_dir != section_root
     ):
         module_sections, _ = module_config_for_dir(module_dir, section_root)
-        for section in module_sections:
-            _add_unique(sections, section)
+        sections.extend(module_sections)
 
-    if not sections:
+    if not sections.as_list():
         return []
-    return expand_sections(sections, section_root)
+    return expand_sections(sections.as_list(), section_root)
 
 
 def headers_for_source(src: Path, source_root: Path, section_root: Path) -> list[Path]:
+    key = (str(src), str(source_root), str(section_root))
+    cached = _headers_cache.get(key)
+    if cached is not None:
+        return cached
+
+    headers = _headers_for_source_uncached(src, source_root, section_root)
+    _headers_cache[key] = headers
+    return headers
+
+
+def _headers_for_source_uncached(
+    src: Path, source_root: Path, section_root: Path
+) -> list[Path]:
     headers: list[Path] = []
     module_root = module_root_for_path(src, source_root)
     if module_root is not None:
-        headers.extend(sorted(module_root.rglob("*.h")))
+        headers.extend(
+            header for header, _ in header_map(source_root).get(module_root, [])
+        )
 
     for section in dependency_sections_for_source(src, source_root, section_root):
         headers.extend(section_headers(section, section_root))
@@ -342,39 +660,213 @@ def source_defines_for_dir(directory: Path, section_root: Path) -> list[str]:
 
 
 def obj_path(src: Path, obj_dir: Path, relative_to: Path) -> Path:
-    return (obj_dir / src.relative_to(relative_to)).with_suffix(".o")
+    # String manipulation instead of Path.relative_to/with_suffix: this
+    # runs once per TU per driver and pathlib is ~10x slower for it.
+    prefix = str(relative_to) + os.sep
+    path = str(src)
+    if not path.startswith(prefix):
+        raise ValueError(f"{src} is not under {relative_to}")
+    rel = path[len(prefix):]
+    return Path(os.path.join(obj_dir, rel[:-2] + ".o"))
+
+
+_build_floor_cache: dict[tuple[str, str], float] = {}
+
+
+def build_floor_for_dir(directory: Path, local_build_root: Path) -> float:
+    """Newest mtime among the .build files governing sources in directory."""
+    key = (str(directory), str(local_build_root))
+    cached = _build_floor_cache.get(key)
+    if cached is not None:
+        return cached
+
+    floor = 0.0
+    root_build = local_build_root / ".build"
+    if root_build.exists():
+        floor = root_build.stat().st_mtime
+
+    if directory != local_build_root and directory.is_relative_to(local_build_root):
+        module_root = local_build_root / directory.relative_to(local_build_root).parts[0]
+        current = directory
+        while current.is_relative_to(module_root):
+            module_build = current / ".build"
+            if module_build.exists() and module_build != root_build:
+                floor = max(floor, module_build.stat().st_mtime)
+            if current == module_root:
+                break
+            current = current.parent
+
+    _build_floor_cache[key] = floor
+    return floor
+
+
+def depfile_deps(obj: Path) -> list[Path] | None:
+    """Dependencies recorded by -MMD for obj, or None before first build."""
+    try:
+        text = Path(f"{obj}.d").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    if ":" not in text:
+        return None
+    body = text.split(":", 1)[1]
+    return [Path(token) for token in body.replace("\\\n", " ").split()]
 
 
 def needs_rebuild(
     src: Path,
     obj: Path,
     *,
-    header_deps: Iterable[Path] = (),
-    extra_deps: Iterable[Path] = (),
-    local_build_root: Path | None = None,
+    header_mtime_max: float = 0.0,
+    floor_mtime: float = 0.0,
 ) -> bool:
     if not obj.exists():
         return True
 
-    deps = [src, *header_deps, *extra_deps]
-    if local_build_root is not None:
-        root_build = local_build_root / ".build"
-        if root_build.exists():
-            deps.append(root_build)
-
-        module_root = module_root_for_path(src, local_build_root)
-        if module_root is not None:
-            current = src.parent
-            while current.is_relative_to(module_root):
-                module_build = current / ".build"
-                if module_build.exists() and module_build != root_build:
-                    deps.append(module_build)
-                if current == module_root:
-                    break
-                current = current.parent
-
     obj_mtime = obj.stat().st_mtime
-    return any(dep.exists() and dep.stat().st_mtime > obj_mtime for dep in deps)
+
+    # A depfile from a previous compile gives the exact #include set;
+    # prefer it over the conservative whole-module header ceiling.
+    deps = depfile_deps(obj)
+    if deps is not None:
+        newest = src.stat().st_mtime
+        for dep in deps:
+            mtime = _header_mtimes.get(dep)
+            if mtime is None:
+                try:
+                    mtime = dep.stat().st_mtime
+                except OSError:
+                    return True
+                _header_mtimes[dep] = mtime
+            if mtime > newest:
+                newest = mtime
+        return obj_mtime < max(newest, floor_mtime)
+
+    return obj_mtime < max(src.stat().st_mtime, header_mtime_max, floor_mtime)
+
+
+def _cache_key(parts: Iterable[bytes]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cached_object(cache_root: Path, key: str) -> Path:
+    return cache_root / key[:2] / key[2:]
+
+
+def _link_or_copy(source: Path, dest: Path) -> None:
+    # Hardlinks make cache hits free of write bandwidth; fall back to a
+    # copy when the filesystem refuses (cross-device, no link support).
+    try:
+        os.link(source, dest)
+        return
+    except FileExistsError:
+        # Another builder stored this entry between our existence check
+        # and the link; the content is identical, so keep theirs.
+        return
+    except OSError:
+        pass
+    # Copy via a temp file and rename into place: dest may be an inode
+    # other objects are hardlinked to, and copyfile would truncate it
+    # under any concurrent reader.
+    tmp = dest.with_name(f"{dest.name}.tmp{os.getpid()}")
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, dest)
+
+
+def _store_cached_object(obj: Path, cached: Path) -> None:
+    if cached.exists():
+        return
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    _link_or_copy(obj, cached)
+
+
+def _restore_cached_object(cached: Path, obj: Path) -> None:
+    if obj.exists():
+        obj.unlink()
+    # Any depfile on disk describes whatever compile last wrote this obj
+    # path, not the restored object; drop it so needs_rebuild falls back
+    # to the conservative header ceiling instead of trusting stale deps.
+    Path(f"{obj}.d").unlink(missing_ok=True)
+    _link_or_copy(cached, obj)
+    os.utime(obj)
+
+
+_PREFIX_MAP_RE = re.compile(r"^(-f(?:file|debug|macro)-prefix-map=).*(=[^=]*)$")
+_LINEMARKER_RE = re.compile(rb'^#\s+\d+\s+"')
+
+
+def _normalized_flags(cmd_flags: list[str]) -> bytes:
+    # The prefix-map flags embed the checkout path; replace it with a
+    # placeholder so two workspaces compute the same cache key.
+    normalized = [_PREFIX_MAP_RE.sub(r"\1<root>\2", flag) for flag in cmd_flags]
+    return " ".join(normalized).encode()
+
+
+def _strip_linemarkers(preprocessed: bytes) -> bytes:
+    # -E output carries absolute paths in linemarkers (# 1 "/abs/…")
+    # that -ffile-prefix-map does not remap; drop them so the hash is
+    # location-independent.
+    return b"\n".join(
+        line
+        for line in preprocessed.split(b"\n")
+        if not _LINEMARKER_RE.match(line)
+    )
+
+
+def _direct_cache_key(
+    cmd_flags: list[str], src: Path, header_deps: Iterable[Path]
+) -> str:
+    parts = [_normalized_flags(cmd_flags), src.read_bytes()]
+    for dep in header_deps:
+        if dep.exists():
+            parts.append(f"{dep}:{dep.stat().st_mtime_ns}".encode())
+    return _cache_key(parts)
+
+
+def _preprocessor_cache_key(
+    cc: str, cmd_flags: list[str], src: Path
+) -> str | None:
+    result = subprocess.run(
+        [cc, *cmd_flags, "-E", str(src)],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return None
+    return _cache_key([_normalized_flags(cmd_flags), _strip_linemarkers(result.stdout)])
+
+
+_response_file_lock = threading.Lock()
+_response_files_written: set[str] = set()
+
+
+def response_file(flags: list[str], rsp_dir: Path) -> Path:
+    """Write flags to an @response file shared by every TU with that flag set.
+
+    One file per unique flag set per run keeps argv construction out of
+    the per-TU hot path; compiles then pass `@file -c src -o obj`.
+    """
+    content = "\n".join(flags) + "\n"
+    digest = hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+    path = rsp_dir / f"flags-{digest}.rsp"
+    with _response_file_lock:
+        if str(path) not in _response_files_written:
+            rsp_dir.mkdir(parents=True, exist_ok=True)
+            write_if_changed(path, content)
+            _response_files_written.add(str(path))
+    return path
+
+
+def make_obj_dirs(objects: Iterable[Path]) -> None:
+    """Create every object parent directory once, ahead of the compile pool.
+
+    compile_source assumes its object directory exists; batching the
+    mkdirs here avoids a per-TU mkdir(parents=True) in the hot loop.
+    """
+    for parent in {obj.parent for obj in objects}:
+        parent.mkdir(parents=True, exist_ok=True)
 
 
 def compile_source(
@@ -388,27 +880,63 @@ def compile_source(
     display_root: Path,
     extra_flags: Iterable[str] = (),
     header_deps: Iterable[Path] = (),
-    extra_deps: Iterable[Path] = (),
-    local_build_root: Path | None = None,
+    header_mtime_max: float = 0.0,
+    floor_mtime: float = 0.0,
+    cache_root: Path | None = None,
 ) -> tuple[Path, bool]:
     obj = obj_path(src, obj_dir, relative_to)
-    obj.parent.mkdir(parents=True, exist_ok=True)
 
     if not needs_rebuild(
         src,
         obj,
-        header_deps=header_deps,
-        extra_deps=extra_deps,
-        local_build_root=local_build_root,
+        header_mtime_max=header_mtime_max,
+        floor_mtime=floor_mtime,
     ):
         return obj, True
 
-    cmd = [cc, *cflags, *extra_flags, *include_flags, "-c", str(src), "-o", str(obj)]
-    print(f"{prefix('cc', GREEN)} {src.relative_to(display_root)}")
+    cmd_flags = [*cflags, *extra_flags, *include_flags]
+    direct_key = pp_key = None
+    if cache_root is not None:
+        direct_key = _direct_cache_key(cmd_flags, src, header_deps)
+        cached = _cached_object(cache_root, direct_key)
+        if cached.exists():
+            with PRINT_LOCK:
+                print(f"{prefix('hit', CYAN)} {src.relative_to(display_root)}")
+            _restore_cached_object(cached, obj)
+            return obj, False
+
+        pp_key = _preprocessor_cache_key(cc, cmd_flags, src)
+        if pp_key is not None:
+            cached = _cached_object(cache_root, pp_key)
+            if cached.exists():
+                with PRINT_LOCK:
+                    print(f"{prefix('hit', CYAN)} {src.relative_to(display_root)}")
+                _restore_cached_object(cached, obj)
+                _store_cached_object(obj, _cached_object(cache_root, direct_key))
+                return obj, False
+
+    rsp = response_file(cmd_flags, obj_dir)
+    cmd = [cc, f"@{rsp}", "-MMD", "-MF", f"{obj}.d", "-c", str(src), "-o", str(obj)]
+    with PRINT_LOCK:
+        print(f"{prefix('cc', GREEN)} {src.relative_to(display_root)}")
     run_command(cmd)
+
+    if cache_root is not None:
+        if pp_key is not None:
+            _store_cached_object(obj, _cached_object(cache_root, pp_key))
+        if direct_key is not None:
+            _store_cached_object(obj, _cached_object(cache_root, direct_key))
     return obj, False
 
 
+def _objects_manifest(objects: list[Path]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for obj in sorted(objects):
+        digest.update(str(obj).encode())
+        digest.update(obj.read_bytes())
+    return digest.hexdigest()
+
+
 def link_executable(
     *,
     cc: str,
@@ -420,6 +948,8 @@ def link_executable(
     extra_deps: Iterable[Path] = (),
 ) -> None:
     bin_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = Path(f"{executable}.manifest")
+    manifest: str | None = None
 
     if executable.exists():
         exe_mtime = executable.stat().st_mtime
@@ -427,12 +957,35 @@ def link_executable(
         dep_times.extend(dep.stat().st_mtime for dep in extra_deps if dep.exists())
         newest_dep = max(dep_times, default=exe_mtime)
         if exe_mtime >= newest_dep:
-            print(f"{prefix('skip', GREY)} {executable.relative_to(root)} (up to date)")
+            with PRINT_LOCK:
+                print(
+                    f"{prefix('skip', GREY)} {executable.relative_to(root)} (up to date)"
+                )
+            return
+
+        # Objects can be newer without being different (e.g. restored
+        # from the cache); skip the relink when their bytes still match
+        # the manifest recorded at the last link.
+        manifest = _objects_manifest(objects)
+        try:
+            recorded = manifest_path.read_text(encoding="utf-8").strip()
+        except OSError:
+            recorded = ""
+        if manifest == recorded:
+            os.utime(executable)
+            with PRINT_LOCK:
+                print(
+                    f"{prefix('skip', GREY)} {executable.relative_to(root)} (unchanged)"
+                )
             return
 
     cmd = [cc, "-o", str(executable), *objects, *ldflags]
-    print(f"{prefix('link', YELLOW)} {executable.relative_to(root)}")
+    with PRINT_LOCK:
+        print(f"{prefix('link', YELLOW)} {executable.relative_to(root)}")
     run_command(cmd)
+    if manifest is None:
+        manifest = _objects_manifest(objects)
+    manifest_path.write_text(manifest + "\n", encoding="utf-8")
 
 
 def write_if_changed(path: Path, content: str) -> None:
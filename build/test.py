@@ -8,6 +8,7 @@ import shutil
 import subprocess
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, NamedTuple
@@ -22,14 +23,22 @@ from common import (
     RED,
     YELLOW,
     banner,
+    build_floor_for_dir,
     colour,
     compile_source,
     expand_sections,
     headers_for_source,
     link_executable,
+    load_parse_cache,
+    make_obj_dirs,
+    max_header_mtime,
+    obj_path,
     parse_sections_and_defines,
     prefix,
+    prioritized_sections,
+    save_parse_cache,
     section_sources,
+    source_map,
     select_cflags,
     source_defines_for_dir,
     unique,
@@ -41,6 +50,7 @@ TESTS_DIR = ROOT / "tests"
 BUILD_DIR = ROOT / "build"
 BIN_DIR = ROOT / "_bin" / "tests"
 OBJ_DIR_BASE = ROOT / "_obj" / "tests"
+CACHE_DIR = Path(os.environ.get("NERD_CACHE_DIR", ROOT / "_cache"))
 SCRIPT_PATH = Path(__file__).resolve()
 COMMON_PATH = BUILD_DIR / "common.py"
 
@@ -88,6 +98,11 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument(
         "-r", "--release", action="store_true", help="Build release profile"
     )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse objects from the content-addressed cache in _cache/",
+    )
     parser.add_argument(
         "-t",
         "--test",
@@ -99,13 +114,13 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
 
 def discover_test_targets() -> list[TestTarget]:
     targets: list[TestTarget] = []
-    for path in sorted(TESTS_DIR.iterdir()):
-        if path.is_file() and path.suffix == ".c":
-            targets.append(TestTarget(path.stem, [path]))
-        elif path.is_dir():
-            sources = sorted(path.rglob("*.c"))
+    for entry in sorted(os.scandir(TESTS_DIR), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.endswith(".c"):
+            targets.append(TestTarget(entry.name[:-2], [TESTS_DIR / entry.name]))
+        elif entry.is_dir():
+            sources = source_map(TESTS_DIR).get(TESTS_DIR / entry.name, [])
             if sources:
-                targets.append(TestTarget(path.name, sources))
+                targets.append(TestTarget(entry.name, sources))
 
     names = [target.name for target in targets]
     if len(names) != len(set(names)):
@@ -128,6 +143,30 @@ def select_tests(test_modules: list[str]) -> list[str]:
     return selected
 
 
+def plan_test_target(
+    target: TestTarget, support_source: Path
+) -> tuple[list[Path], dict[Path, list[str]]]:
+    """Resolve the full source list and per-source defines for one target."""
+    target_sections: list[str] = []
+    defines_by_source: dict[Path, list[str]] = {}
+    for src in target.sources:
+        source_sections, defines = parse_sections_and_defines(src, SRC_DIR)
+        defines_by_source[src] = defines
+        for section in source_sections:
+            if section not in target_sections:
+                target_sections.append(section)
+
+    dependency_sources = unique(
+        src
+        for section in prioritized_sections(
+            expand_sections(target_sections, SRC_DIR), SRC_DIR
+        )
+        for src in section_sources(section, SRC_DIR)
+    )
+    target_sources = unique([*target.sources, support_source, *dependency_sources])
+    return target_sources, defines_by_source
+
+
 def executable_path(test_name: str, profile: str) -> Path:
     suffix = "-debug" if profile == "debug" else ""
     extension = ".exe" if os.name == "nt" else ""
@@ -323,8 +362,10 @@ def main(argv: list[str] | None = None) -> None:
     args = parse_args(argv)
 
     profile = "release" if args.release else "debug"
-    cflags = select_cflags(profile)
+    cflags = select_cflags(profile, ROOT)
     obj_dir = OBJ_DIR_BASE / profile
+    parse_cache_path = obj_dir / ".parse_cache.pkl"
+    load_parse_cache(parse_cache_path)
     include_flags = ["-Isrc", "-Ibuild"]
 
     available_targets = {target.name: target for target in discover_test_targets()}
@@ -339,76 +380,93 @@ def main(argv: list[str] | None = None) -> None:
     sources_by_test: dict[str, list[Path]] = {}
     all_sources: list[Path] = [support_source]
 
-    for test_name in tests:
-        target = available_targets[test_name]
-        target_sections: list[str] = []
-        for src in target.sources:
-            source_sections, defines = parse_sections_and_defines(src, SRC_DIR)
-            root_defines[src] = defines
-            for section in source_sections:
-                if section not in target_sections:
-                    target_sections.append(section)
-
-        dependency_sources = unique(
-            src
-            for section in expand_sections(target_sections, SRC_DIR)
-            for src in section_sources(section, SRC_DIR)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        planned = list(
+            executor.map(
+                lambda test_name: plan_test_target(
+                    available_targets[test_name], support_source
+                ),
+                tests,
+            )
         )
-        target_sources = unique([*target.sources, support_source, *dependency_sources])
+    for test_name, (target_sources, defines_by_source) in zip(tests, planned):
+        root_defines.update(defines_by_source)
         sources_by_test[test_name] = target_sources
         all_sources.extend(target_sources)
 
     all_sources = unique(all_sources)
 
+    tool_mtime = max(SCRIPT_PATH.stat().st_mtime, COMMON_PATH.stat().st_mtime)
     extra_flags_by_source: dict[Path, list[str]] = {}
     header_deps_by_source: dict[Path, list[Path]] = {}
     relative_roots: dict[Path, Path] = {}
-    local_build_roots: dict[Path, Path | None] = {}
+    floor_by_source: dict[Path, float] = {}
 
     for src in all_sources:
         if src == support_source:
             extra_flags_by_source[src] = ["-DTEST"]
             header_deps_by_source[src] = [BUILD_DIR / "test.h"]
             relative_roots[src] = ROOT
-            local_build_roots[src] = BUILD_DIR
+            floor_by_source[src] = max(
+                tool_mtime, build_floor_for_dir(src.parent, BUILD_DIR)
+            )
             continue
 
         if src.is_relative_to(TESTS_DIR):
-            extra_flags_by_source[src] = ["-DTEST", *[f"-D{define}" for define in root_defines[src]]]
+            extra_flags_by_source[src] = [
+                "-DTEST",
+                *[f"-D{define}" for define in sorted(root_defines[src])],
+            ]
             header_deps_by_source[src] = headers_for_source(src, TESTS_DIR, SRC_DIR)
             relative_roots[src] = ROOT
-            local_build_roots[src] = TESTS_DIR
+            floor_by_source[src] = max(
+                tool_mtime, build_floor_for_dir(src.parent, TESTS_DIR)
+            )
             continue
 
         defines = source_defines_for_dir(src.parent, SRC_DIR)
-        extra_flags_by_source[src] = ["-DTEST", *[f"-D{define}" for define in defines]]
+        extra_flags_by_source[src] = [
+            "-DTEST",
+            *[f"-D{define}" for define in sorted(defines)],
+        ]
         header_deps_by_source[src] = headers_for_source(src, SRC_DIR, SRC_DIR)
         relative_roots[src] = ROOT
-        local_build_roots[src] = SRC_DIR
+        floor_by_source[src] = max(tool_mtime, build_floor_for_dir(src.parent, SRC_DIR))
+
+    save_parse_cache(parse_cache_path)
+
+    make_obj_dirs(
+        obj_path(src, obj_dir, relative_roots[src]) for src in all_sources
+    )
 
     compiled: dict[Path, Path] = {}
     skipped_sources = 0
-    for src in all_sources:
-        obj, skipped = compile_source(
-            cc=CC,
-            cflags=cflags,
-            include_flags=include_flags,
-            obj_dir=obj_dir,
-            src=src,
-            relative_to=relative_roots[src],
-            display_root=ROOT,
-            extra_flags=extra_flags_by_source.get(src, []),
-            header_deps=header_deps_by_source.get(src, []),
-            extra_deps=[SCRIPT_PATH, COMMON_PATH],
-            local_build_root=local_build_roots[src],
-        )
-        compiled[src] = obj
-        if skipped:
-            skipped_sources += 1
-
-    executables: list[tuple[str, Path]] = []
-    for test_name in tests:
-        executable = executable_path(test_name, profile)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            executor.submit(
+                compile_source,
+                cc=CC,
+                cflags=cflags,
+                include_flags=include_flags,
+                obj_dir=obj_dir,
+                src=src,
+                relative_to=relative_roots[src],
+                display_root=ROOT,
+                extra_flags=extra_flags_by_source.get(src, []),
+                header_deps=header_deps_by_source.get(src, []),
+                header_mtime_max=max_header_mtime(header_deps_by_source.get(src, [])),
+                floor_mtime=floor_by_source[src],
+                cache_root=CACHE_DIR if args.cache else None,
+            ): src
+            for src in all_sources
+        }
+        for future in as_completed(futures):
+            obj, skipped = future.result()
+            compiled[futures[future]] = obj
+            if skipped:
+                skipped_sources += 1
+
+    def link_test(test_name: str) -> None:
         objects = [compiled[src] for src in sources_by_test[test_name]]
         link_executable(
             cc=CC,
@@ -416,9 +474,12 @@ def main(argv: list[str] | None = None) -> None:
             bin_dir=BIN_DIR,
             root=ROOT,
             objects=objects,
-            executable=executable,
+            executable=executable_path(test_name, profile),
         )
-        executables.append((test_name, executable))
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(link_test, tests))
+    executables = [(test_name, executable_path(test_name, profile)) for test_name in tests]
 
     print(f"{prefix('skip', GREY)} {skipped_sources} source file(s) up to date")
 